@@ -1,10 +1,27 @@
 import itertools as it
 
 import numpy as np
+import tensorflow as tf
 from tensorflow.keras import utils
 from scipy import sparse
 
 
+def _ratings_dataset(ratings, batch_size, shuffle, seed):
+    """
+    Build a batched tf.data.Dataset over an array of rating triples.
+
+    :param ratings: A numpy array of triples (UserID, ItemID, Rating).
+    :param batch_size: The batch size.
+    :param shuffle: Whether to shuffle the dataset at each iteration.
+    :param seed: The seed value used to shuffle the dataset.
+    :return: A tf.data.Dataset yielding batches of rating triples.
+    """
+    dataset = tf.data.Dataset.from_tensor_slices(ratings)
+    if shuffle:
+        dataset = dataset.shuffle(len(ratings), seed=seed, reshuffle_each_iteration=True)
+    return dataset.batch(batch_size)
+
+
 class UserItemEmbeddings(utils.Sequence):
     def __init__(
             self,
@@ -66,6 +83,24 @@ class UserItemEmbeddings(utils.Sequence):
         item_embeddings = self.embeddings[ratings[:, 1]]
         return (user_embeddings, item_embeddings), ratings[:, 2]
 
+    def to_dataset(self):
+        """
+        Convert the sequence to a tf.data.Dataset, so that shuffling, batching and the
+        embedding gathers run in the TF runtime and can overlap with the model compute.
+
+        :return: A batched and prefetched tf.data.Dataset yielding the same batches as the sequence.
+        """
+        embeddings = tf.convert_to_tensor(self.embeddings)
+        dataset = _ratings_dataset(self.ratings, self.batch_size, self.shuffle, self.seed)
+        dataset = dataset.map(
+            lambda ratings: (
+                (tf.gather(embeddings, ratings[:, 0]), tf.gather(embeddings, ratings[:, 1])),
+                ratings[:, 2]
+            ),
+            num_parallel_calls=tf.data.AUTOTUNE
+        )
+        return dataset.prefetch(tf.data.AUTOTUNE)
+
     def on_epoch_end(self):
         """
         Shuffles the indexes at the end of every epoch.
@@ -135,6 +170,31 @@ class HybridUserItemEmbeddings(utils.Sequence):
         (user_bert_embeddings, item_bert_embeddings), _ = self.bert_embeddings[idx]
         return (user_graph_embeddings, item_graph_embeddings, user_bert_embeddings, item_bert_embeddings), ratings
 
+    def to_dataset(self):
+        """
+        Convert the sequence to a tf.data.Dataset, so that shuffling, batching and the
+        embedding gathers run in the TF runtime and can overlap with the model compute.
+
+        :return: A batched and prefetched tf.data.Dataset yielding the same batches as the sequence.
+        """
+        graph_embeddings = tf.convert_to_tensor(self.graph_embeddings.embeddings)
+        bert_embeddings = tf.convert_to_tensor(self.bert_embeddings.embeddings)
+        dataset = _ratings_dataset(
+            self.ratings,
+            self.graph_embeddings.batch_size, self.graph_embeddings.shuffle, self.graph_embeddings.seed
+        )
+        dataset = dataset.map(
+            lambda ratings: (
+                (
+                    tf.gather(graph_embeddings, ratings[:, 0]), tf.gather(graph_embeddings, ratings[:, 1]),
+                    tf.gather(bert_embeddings, ratings[:, 0]), tf.gather(bert_embeddings, ratings[:, 1])
+                ),
+                ratings[:, 2]
+            ),
+            num_parallel_calls=tf.data.AUTOTUNE
+        )
+        return dataset.prefetch(tf.data.AUTOTUNE)
+
     def on_epoch_end(self):
         """
         Calls on_epoch_end() to any sub-sequence.
@@ -202,6 +262,21 @@ class UserItemGraph(utils.Sequence):
             ratings = self.ratings[batch_idx:batch_off]
         return (ratings[:, 0], ratings[:, 1]), ratings[:, 2]
 
+    def to_dataset(self):
+        """
+        Convert the sequence to a tf.data.Dataset, so that shuffling and batching run in the
+        TF runtime. Note that only the user and item IDs vary per batch: the adjacency matrix
+        stays a constant of the model.
+
+        :return: A batched and prefetched tf.data.Dataset yielding the same batches as the sequence.
+        """
+        dataset = _ratings_dataset(self.ratings, self.batch_size, self.shuffle, self.seed)
+        dataset = dataset.map(
+            lambda ratings: ((ratings[:, 0], ratings[:, 1]), ratings[:, 2]),
+            num_parallel_calls=tf.data.AUTOTUNE
+        )
+        return dataset.prefetch(tf.data.AUTOTUNE)
+
     def on_epoch_end(self):
         """
         Shuffles the indexes at the end of every epoch.
@@ -365,6 +440,30 @@ class UserItemGraphEmbeddings(utils.Sequence):
         (user_embeddings, item_embeddings), _ = self.embeddings[idx]
         return (user_ids, item_ids, user_embeddings, item_embeddings), ratings
 
+    def to_dataset(self):
+        """
+        Convert the sequence to a tf.data.Dataset, so that shuffling, batching and the
+        embedding gathers run in the TF runtime and can overlap with the model compute.
+
+        :return: A batched and prefetched tf.data.Dataset yielding the same batches as the sequence.
+        """
+        embeddings = tf.convert_to_tensor(self.embeddings.embeddings)
+        dataset = _ratings_dataset(
+            self.ratings,
+            self.graph_ids.batch_size, self.graph_ids.shuffle, self.graph_ids.seed
+        )
+        dataset = dataset.map(
+            lambda ratings: (
+                (
+                    ratings[:, 0], ratings[:, 1],
+                    tf.gather(embeddings, ratings[:, 0]), tf.gather(embeddings, ratings[:, 1])
+                ),
+                ratings[:, 2]
+            ),
+            num_parallel_calls=tf.data.AUTOTUNE
+        )
+        return dataset.prefetch(tf.data.AUTOTUNE)
+
     def on_epoch_end(self):
         """
         Calls on_epoch_end() to any sub-sequence.
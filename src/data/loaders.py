@@ -1,11 +1,212 @@
+import hashlib
 import json
+import os
+from concurrent.futures import ThreadPoolExecutor
 
 import pandas as pd
 import numpy as np
+from scipy import sparse
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import pyarrow.csv as pacsv
+except ImportError:
+    pacsv = None
+
+try:
+    import ml_dtypes
+except ImportError:
+    ml_dtypes = None
 
 from data.datasets import UserItemEmbeddings, HybridUserItemEmbeddings
 from data.datasets import UserItemGraph, UserItemGraphEmbeddings, UserItemGraphPosNegSample
 from data.preprocess import get_user_properties, build_adjacency_matrix
+from utilities.math import pack_csr, to_csr32
+
+
+def _resolve_embedding_dtype(embedding_dtype):
+    """
+    Resolve an embedding dtype name to a Numpy dtype.
+
+    Graph and BERT embeddings are only matmul inputs downstream, hence they tolerate half
+    precision storage, which halves their memory footprint and the bytes shipped to the GPU.
+    'bfloat16' requires the ml_dtypes package; when it is missing, float16 is used instead.
+
+    :param embedding_dtype: The dtype name, e.g. 'float32', 'float16' or 'bfloat16'.
+    :return: The resolved Numpy dtype.
+    """
+    if embedding_dtype == 'bfloat16':
+        if ml_dtypes is not None:
+            return np.dtype(ml_dtypes.bfloat16)
+        return np.dtype(np.float16)
+    return np.dtype(embedding_dtype)
+
+
+# Local directory where memory-mapped embedding tables are stored
+_EMBEDDINGS_CACHE_DIR = os.path.join('.cache', 'embeddings')
+
+# In-process cache of gathered embedding tables, so sibling loaders of the same run
+# (e.g. hybrid and graph+BERT on the same files) do not re-read and re-stack the same JSONs
+_embeddings_cache = dict()
+
+
+def _embeddings_cache_key(filepaths, users, items, embedding_dtype):
+    """
+    Build the in-process cache key of a gathered embeddings table.
+
+    :param filepaths: The embeddings source filepaths.
+    :param users: A list of users IDs.
+    :param items: A list of items IDs.
+    :param embedding_dtype: The dtype used to store the embeddings.
+    :return: A hashable cache key.
+    """
+    # Hashing the IDs bytes is cheap with respect to re-parsing hundreds of MBs of JSON
+    sha = hashlib.sha1()
+    sha.update(np.ascontiguousarray(users))
+    sha.update(np.ascontiguousarray(items))
+    fingerprints = tuple(_file_fingerprint(filepath) for filepath in filepaths)
+    return fingerprints, str(embedding_dtype), sha.hexdigest()
+
+
+def _embeddings_tag(filepaths, users, items, embedding_dtype):
+    """
+    Build a unique tag of a gathered embeddings table, based on its source files,
+    the users/items gather order and the dtype.
+
+    :param filepaths: The embeddings source filepaths.
+    :param users: A list of users IDs, in the order the table was gathered.
+    :param items: A list of items IDs, in the order the table was gathered.
+    :param embedding_dtype: The dtype used to store the embeddings.
+    :return: A hexadecimal tag string.
+    """
+    # The persisted array is the table gathered in users/items order, which depends on
+    # the ratings split: the IDs must be part of the tag or a run on a different split
+    # would silently reuse the rows of a previous one
+    sha = hashlib.sha1()
+    sha.update(np.ascontiguousarray(users))
+    sha.update(np.ascontiguousarray(items))
+    fingerprints = tuple(_file_fingerprint(filepath) for filepath in filepaths) + (embedding_dtype,)
+    sha.update(repr(fingerprints).encode())
+    return sha.hexdigest()[:16]
+
+
+def _memory_map_embeddings(embeddings, tag):
+    """
+    Persist an embeddings table to the local cache directory and reopen it memory-mapped.
+
+    The train and test sequences (and any forked or spawned worker) then share the same
+    OS pages of the table, instead of each holding or pickling a private copy.
+
+    :param embeddings: The embeddings table as a Numpy array.
+    :param tag: A unique tag of the table contents, as built by _embeddings_tag.
+    :return: A read-only memory-mapped view of the table.
+    """
+    os.makedirs(_EMBEDDINGS_CACHE_DIR, exist_ok=True)
+    filepath = os.path.join(_EMBEDDINGS_CACHE_DIR, 'emb_{}.npy'.format(tag))
+    if not os.path.exists(filepath):
+        np.save(filepath, embeddings)
+    return np.load(filepath, mmap_mode='r')
+
+
+if numba is not None:
+    @numba.njit(cache=True)
+    def _merge_remap(ids, values):
+        indexes = np.empty(len(values), dtype=np.int64)
+        cursor = 0
+        n = len(ids)
+        for i in range(len(values)):
+            while cursor < n and ids[cursor] < values[i]:
+                cursor += 1
+            indexes[i] = cursor
+        return indexes
+else:
+    _merge_remap = None
+
+
+def _remap_ids(ids, values):
+    """
+    Map an array of original IDs to their positions within a sorted array of unique IDs.
+
+    If the values to remap are themselves sorted (the common export format of ratings files,
+    ordered by user) and Numba is available, a single linear merge over both arrays is used
+    instead of one binary search per value.
+
+    :param ids: The sorted array of unique IDs (as returned by np.unique).
+    :param values: The array of IDs to remap.
+    :return: The positions of the values within the unique IDs array.
+    """
+    if _merge_remap is not None and len(values) > 1 and np.all(values[:-1] <= values[1:]):
+        return _merge_remap(ids, values)
+    return np.searchsorted(ids, values)
+
+
+# In-process cache of load_train_test_ratings results, so that the loaders of the same run
+# (e.g. graph, BERT and hybrid embeddings on the same ratings files) share a single parse
+_ratings_cache = dict()
+
+
+def _file_fingerprint(filepath):
+    """
+    Build a cache fingerprint of a file, based on its path, modification time and size.
+
+    :param filepath: The file path. It can be None.
+    :return: A hashable fingerprint of the file.
+    """
+    if filepath is None:
+        return None
+    stats = os.stat(filepath)
+    return filepath, stats.st_mtime_ns, stats.st_size
+
+
+def _read_csv_numpy(filepath, sep):
+    """
+    Read a headerless CSV or TSV file directly into a Numpy array.
+
+    The multi-threaded PyArrow CSV parser is used when available, converting each column
+    to Numpy without materializing an intermediate dataframe. Otherwise it falls back to
+    the Pandas reader.
+
+    :param filepath: The CSV or TSV filepath.
+    :param sep: The separator to use for CSV or TSV files.
+    :return: The file contents as a Numpy array.
+    """
+    if pacsv is not None:
+        table = pacsv.read_csv(
+            filepath,
+            parse_options=pacsv.ParseOptions(delimiter=sep),
+            read_options=pacsv.ReadOptions(autogenerate_column_names=True)
+        )
+        return np.column_stack([table.column(i).to_numpy(zero_copy_only=False) for i in range(table.num_columns)])
+    return pd.read_csv(filepath, sep=sep, header=None).to_numpy()
+
+
+def _stack_ratings_int32(users_indexes, items_indexes, ratings):
+    """
+    Pack remapped User-Item-Rating columns into a single int32 array.
+
+    Plain np.stack would upcast to the widest input dtype (int64 from the CSV parse), while
+    the sequential indices and the 0/1 ratings comfortably fit in int32, halving the memory
+    touched by every downstream gather over the triples.
+
+    :param users_indexes: The sequential users indices.
+    :param items_indexes: The sequential items indices.
+    :param ratings: The ratings column.
+    :return: The packed (UserID, ItemID, Rating) int32 array.
+    """
+    triples = np.empty((len(users_indexes), 3), dtype=np.int32)
+    triples[:, 0] = users_indexes
+    triples[:, 1] = items_indexes
+    triples[:, 2] = ratings
+    return triples
 
 
 def load_train_test_ratings(
@@ -20,6 +221,7 @@ def load_train_test_ratings(
 ):
     """
     Load train and test ratings. Note that the user and item IDs are converted to sequential numbers.
+    Note also that the results are cached in-process, so repeated calls on unchanged files skip parsing.
 
     :param train_filepath: The training ratings CSV or TSV filepath.
     :param test_filepath: The test ratings CSV or TSV filepath.
@@ -39,33 +241,44 @@ def load_train_test_ratings(
              Moreover, it returns the users and items original unique IDs. Additionally, it also returns the training
              interactions adjacency matrix (assuming un-directed arcs).
     """
+    # Lookup the cache first, keyed on the files fingerprints and the loading flags
+    cache_key = (
+        _file_fingerprint(train_filepath), _file_fingerprint(test_filepath), _file_fingerprint(props_filepath),
+        sep, return_adjacency, type_adjacency, sparse_adjacency, symmetric_adjacency
+    )
+    if cache_key in _ratings_cache:
+        return _ratings_cache[cache_key]
+
     # Load the ratings arrays
-    train_ratings = pd.read_csv(train_filepath, sep=sep, header=None).to_numpy()
-    test_ratings = pd.read_csv(test_filepath, sep=sep, header=None).to_numpy()
+    train_ratings = _read_csv_numpy(train_filepath, sep)
+    test_ratings = _read_csv_numpy(test_filepath, sep)
 
     # Convert users and items ids to indices (i.e. sequential)
     users, users_indexes = np.unique(train_ratings[:, 0], return_inverse=True)
     items, items_indexes = np.unique(train_ratings[:, 1], return_inverse=True)
     items_indexes += len(users)
-    train_ratings = np.stack([users_indexes, items_indexes, train_ratings[:, 2]], axis=1)
+    train_ratings = _stack_ratings_int32(users_indexes, items_indexes, train_ratings[:, 2])
 
     # Do the same for the test ratings, by using the same users and items of the train ratings
-    users_indexes = np.argwhere(test_ratings[:, [0]] == users)[:, 1]
-    items_indexes = np.argwhere(test_ratings[:, [1]] == items)[:, 1]
+    # Note that users and items are sorted (np.unique), hence a binary search is enough
+    users_indexes = _remap_ids(users, test_ratings[:, 0])
+    items_indexes = _remap_ids(items, test_ratings[:, 1])
     items_indexes += len(users)
-    test_ratings = np.stack([users_indexes, items_indexes, test_ratings[:, 2]], axis=1)
+    test_ratings = _stack_ratings_int32(users_indexes, items_indexes, test_ratings[:, 2])
 
     if not return_adjacency:
-        return (train_ratings, test_ratings), (users, items)
+        result = (train_ratings, test_ratings), (users, items)
+        _ratings_cache[cache_key] = result
+        return result
 
     # Load the properties, if specified
     if (type_adjacency in ['unary-kg', 'unary-uip']) and props_filepath is not None:
-        props_triples = pd.read_csv(props_filepath, sep=sep, header=None).to_numpy()
-        items_indexes = np.argwhere(props_triples[:, [0]] == items)[:, 1]
+        props_triples = _read_csv_numpy(props_filepath, sep)
+        items_indexes = _remap_ids(items, props_triples[:, 0])
         props, props_indexes = np.unique(props_triples[:, 1], return_inverse=True)
         props_indexes += len(items)
-        ones = np.ones(len(props_indexes), dtype=props_triples.dtype)
-        props_triples = np.stack([items_indexes, props_indexes, ones], axis=1)
+        ones = np.ones(len(props_indexes), dtype=np.int32)
+        props_triples = _stack_ratings_int32(items_indexes, props_indexes, ones)
     else:
         props = None
         props_triples = None
@@ -79,7 +292,19 @@ def load_train_test_ratings(
         symmetric_adjacency=symmetric_adjacency
     )
 
-    return (train_ratings, test_ratings), (users, items), adj_matrix
+    # Standardize sparse adjacency matrices to CSR with 32-bit arrays, so that downstream
+    # consumers (SpMM, graph samplers) work on the most compact contiguous representation
+    # Note matrices handed over together are also repacked into shared contiguous buffers
+    if isinstance(adj_matrix, tuple):
+        adj_matrix = tuple(to_csr32(matrix) for matrix in adj_matrix)
+        if all(sparse.issparse(matrix) for matrix in adj_matrix):
+            adj_matrix = tuple(pack_csr(adj_matrix))
+    else:
+        adj_matrix = to_csr32(adj_matrix)
+
+    result = (train_ratings, test_ratings), (users, items), adj_matrix
+    _ratings_cache[cache_key] = result
+    return result
 
 
 def json_load_graph_embeddings(filepath):
@@ -89,8 +314,12 @@ def json_load_graph_embeddings(filepath):
     :param filepath: The file path.
     :return: The pre-computed graph embeddings as list.
     """
-    with open(filepath) as fp:
-        embeddings = json.load(fp)
+    if orjson is not None:
+        with open(filepath, 'rb') as fp:
+            embeddings = orjson.loads(fp.read())
+    else:
+        with open(filepath) as fp:
+            embeddings = json.load(fp)
     return embeddings['ent_embeddings']
 
 
@@ -105,22 +334,70 @@ def json_load_bert_embeddings(filepath):
     return embeddings.sort_values(by=['ID_OpenKE'])
 
 
-def load_graph_user_item_embeddings(filepath, users, items):
+def gather_graph_embeddings(embeddings, users, items, embedding_dtype='float32'):
+    """
+    Gather users and items graph embeddings from the parsed embeddings list.
+
+    :param embeddings: The parsed graph embeddings as a list of lists.
+    :param users: A list of users IDs.
+    :param items: A list of items IDs.
+    :param embedding_dtype: The dtype used to store the embeddings, e.g. 'float32' or 'bfloat16'.
+    :return: A Numpy array containing both users and items pre-computed graph embeddings.
+    """
+    # Fill a preallocated array row by row, instead of converting the whole list of lists at once
+    # Note that every row assignment follows NumPy's C-level sequence conversion fast path
+    graph_embeddings = np.empty((len(embeddings), len(embeddings[0])), dtype=_resolve_embedding_dtype(embedding_dtype))
+    for i, row in enumerate(embeddings):
+        graph_embeddings[i] = row
+
+    # Gather users and items rows with a single fancy-index, instead of two gathers plus a concatenate
+    return graph_embeddings[np.concatenate([users, items])]
+
+
+def gather_bert_embeddings(df_users, df_items, users, items, embedding_dtype='float32'):
+    """
+    Gather users and items BERT embeddings from the parsed embeddings dataframes.
+
+    :param df_users: The users BERT embeddings as Pandas dataframe, sorted by ID.
+    :param df_items: The items BERT embeddings as Pandas dataframe, sorted by ID.
+    :param users: A list of users IDs.
+    :param items: A list of items IDs.
+    :param embedding_dtype: The dtype used to store the embeddings, e.g. 'float32' or 'bfloat16'.
+    :return: A Numpy array containing both users and items pre-computed BERT embeddings.
+    """
+    # Stack the embeddings column-wise, then reorder the rows according to the given users and items IDs
+    # Note that the dataframes are already sorted by ID, hence a binary search is enough
+    embedding_dtype = _resolve_embedding_dtype(embedding_dtype)
+    user_ids = df_users['ID_OpenKE'].to_numpy()
+    item_ids = df_items['ID_OpenKE'].to_numpy()
+    user_embeddings = np.stack(df_users['profile_embedding'].to_numpy()).astype(embedding_dtype, copy=False)
+    item_embeddings = np.stack(df_items['embedding'].to_numpy()).astype(embedding_dtype, copy=False)
+    user_embeddings = user_embeddings[np.searchsorted(user_ids, users)]
+    item_embeddings = item_embeddings[np.searchsorted(item_ids, items)]
+    return np.concatenate([user_embeddings, item_embeddings], axis=0)
+
+
+def load_graph_user_item_embeddings(filepath, users, items, embedding_dtype='float32'):
     """
     Load users and items pre-computed graph embeddings from a JSON file.
 
     :param filepath: The file path.
     :param users: A list of users IDs.
     :param items: A list of items IDs.
+    :param embedding_dtype: The dtype used to store the embeddings, e.g. 'float32' or 'bfloat16'.
     :return: A Numpy array containing both users and items pre-computed graph embeddings.
     """
-    graph_embeddings = np.array(json_load_graph_embeddings(filepath), dtype=np.float32)
-    user_embeddings = graph_embeddings[users]
-    item_embeddings = graph_embeddings[items]
-    return np.concatenate([user_embeddings, item_embeddings], axis=0)
+    cache_key = _embeddings_cache_key([filepath], users, items, embedding_dtype)
+    if cache_key in _embeddings_cache:
+        return _embeddings_cache[cache_key]
+    graph_embeddings = gather_graph_embeddings(
+        json_load_graph_embeddings(filepath), users, items, embedding_dtype=embedding_dtype
+    )
+    _embeddings_cache[cache_key] = graph_embeddings
+    return graph_embeddings
 
 
-def load_bert_user_item_embeddings(user_filepath, item_filepath, users, items):
+def load_bert_user_item_embeddings(user_filepath, item_filepath, users, items, embedding_dtype='float32'):
     """
     Load users and items pre-computed BERT embeddings from JSON files.
 
@@ -128,20 +405,19 @@ def load_bert_user_item_embeddings(user_filepath, item_filepath, users, items):
     :param item_filepath: The file path for items.
     :param users: A list of users IDs.
     :param items: A list of items IDs.
+    :param embedding_dtype: The dtype used to store the embeddings, e.g. 'float32' or 'bfloat16'.
     :return: A Numpy array containing both users and items pre-computed graph embeddings.
     """
-    user_embeddings, item_embeddings = dict(), dict()
-    df_users = json_load_bert_embeddings(user_filepath)
-    df_items = json_load_bert_embeddings(item_filepath)
-    for _, user in df_users.iterrows():
-        user_id = user['ID_OpenKE']
-        user_embeddings[user_id] = np.array(user['profile_embedding'], dtype=np.float32)
-    for _, item in df_items.iterrows():
-        item_id = item['ID_OpenKE']
-        item_embeddings[item_id] = np.array(item['embedding'], dtype=np.float32)
-    user_embeddings = np.stack([user_embeddings[u] for u in users])
-    item_embeddings = np.stack([item_embeddings[i] for i in items])
-    return np.concatenate([user_embeddings, item_embeddings], axis=0)
+    cache_key = _embeddings_cache_key([user_filepath, item_filepath], users, items, embedding_dtype)
+    if cache_key in _embeddings_cache:
+        return _embeddings_cache[cache_key]
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        df_users_future = executor.submit(json_load_bert_embeddings, user_filepath)
+        df_items_future = executor.submit(json_load_bert_embeddings, item_filepath)
+        df_users, df_items = df_users_future.result(), df_items_future.result()
+    bert_embeddings = gather_bert_embeddings(df_users, df_items, users, items, embedding_dtype=embedding_dtype)
+    _embeddings_cache[cache_key] = bert_embeddings
+    return bert_embeddings
 
 
 def load_graph_embeddings(
@@ -151,7 +427,9 @@ def load_graph_embeddings(
         sep='\t',
         shuffle=True,
         train_batch_size=1024,
-        test_batch_size=2048
+        test_batch_size=2048,
+        embedding_dtype='float32',
+        mmap_embeddings=False
 ):
     """
     Load train and test ratings datasets consisting of Graph embeddings.
@@ -163,6 +441,8 @@ def load_graph_embeddings(
     :param shuffle: Tells if shuffle the training dataset.
     :param train_batch_size: batch_size used in training phase.
     :param test_batch_size: batch_size used in test phase.
+    :param embedding_dtype: The dtype used to store the embeddings, e.g. 'float32' or 'bfloat16'.
+    :param mmap_embeddings: Whether to share the embeddings table via a memory-mapped file.
     :return: The training and test ratings data sequence for graph embeddings RS models.
     """
     (train_ratings, test_ratings), (users, items) = \
@@ -171,7 +451,11 @@ def load_graph_embeddings(
                                 sep=sep,
                                 return_adjacency=False)
 
-    graph_embeddings = load_graph_user_item_embeddings(graph_filepath, users, items)
+    graph_embeddings = load_graph_user_item_embeddings(graph_filepath, users, items,
+                                                       embedding_dtype=embedding_dtype)
+    if mmap_embeddings:
+        graph_embeddings = _memory_map_embeddings(
+            graph_embeddings, _embeddings_tag([graph_filepath], users, items, embedding_dtype))
 
     data_train = UserItemEmbeddings(
         train_ratings, users, items, graph_embeddings,
@@ -192,7 +476,9 @@ def load_bert_embeddings(
         sep='\t',
         shuffle=True,
         train_batch_size=1024,
-        test_batch_size=2048
+        test_batch_size=2048,
+        embedding_dtype='float32',
+        mmap_embeddings=False
 ):
     """
     Load train and test ratings datasets consisting of BERT embeddings.
@@ -205,6 +491,8 @@ def load_bert_embeddings(
     :param shuffle: Tells if shuffle the training dataset.
     :param train_batch_size: batch_size used in training phase.
     :param test_batch_size: batch_size used in test phase.
+    :param embedding_dtype: The dtype used to store the embeddings, e.g. 'float32' or 'bfloat16'.
+    :param mmap_embeddings: Whether to share the embeddings table via a memory-mapped file.
     :return: The training and test ratings data sequence for graph embeddings RS models.
     """
     (train_ratings, test_ratings), (users, items) = \
@@ -213,7 +501,11 @@ def load_bert_embeddings(
                                 sep=sep,
                                 return_adjacency=False)
 
-    bert_embeddings = load_bert_user_item_embeddings(bert_user_filepath, bert_item_filepath, users, items)
+    bert_embeddings = load_bert_user_item_embeddings(bert_user_filepath, bert_item_filepath, users, items,
+                                                     embedding_dtype=embedding_dtype)
+    if mmap_embeddings:
+        bert_embeddings = _memory_map_embeddings(
+            bert_embeddings, _embeddings_tag([bert_user_filepath, bert_item_filepath], users, items, embedding_dtype))
 
     data_train = UserItemEmbeddings(
         train_ratings, users, items, bert_embeddings,
@@ -235,7 +527,9 @@ def load_hybrid_embeddings(
         sep='\t',
         shuffle=True,
         train_batch_size=1024,
-        test_batch_size=2048
+        test_batch_size=2048,
+        embedding_dtype='float32',
+        mmap_embeddings=False
 ):
     """
     Load train and test ratings datasets consisting of BERT+Graph embeddings.
@@ -249,16 +543,34 @@ def load_hybrid_embeddings(
     :param shuffle: Tells if shuffle the training dataset.
     :param train_batch_size: batch_size used in training phase.
     :param test_batch_size: batch_size used in test phase.
+    :param embedding_dtype: The dtype used to store the embeddings, e.g. 'float32' or 'bfloat16'.
+    :param mmap_embeddings: Whether to share the embeddings tables via memory-mapped files.
     :return: The training and test ratings data sequence for hybrid CBRS models.
     """
+    # Resolve the ratings first (cached across loaders), then load the graph and BERT
+    # embeddings concurrently; both loaders skip parsing entirely on a cache hit
     (train_ratings, test_ratings), (users, items) = \
         load_train_test_ratings(train_ratings_filepath,
                                 test_ratings_filepath,
                                 sep=sep,
                                 return_adjacency=False)
 
-    graph_embeddings = load_graph_user_item_embeddings(graph_filepath, users, items)
-    bert_embeddings = load_bert_user_item_embeddings(bert_user_filepath, bert_item_filepath, users, items)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        graph_future = executor.submit(
+            load_graph_user_item_embeddings, graph_filepath, users, items,
+            embedding_dtype=embedding_dtype
+        )
+        bert_future = executor.submit(
+            load_bert_user_item_embeddings, bert_user_filepath, bert_item_filepath, users, items,
+            embedding_dtype=embedding_dtype
+        )
+        graph_embeddings, bert_embeddings = graph_future.result(), bert_future.result()
+
+    if mmap_embeddings:
+        graph_embeddings = _memory_map_embeddings(
+            graph_embeddings, _embeddings_tag([graph_filepath], users, items, embedding_dtype))
+        bert_embeddings = _memory_map_embeddings(
+            bert_embeddings, _embeddings_tag([bert_user_filepath, bert_item_filepath], users, items, embedding_dtype))
 
     data_train = HybridUserItemEmbeddings(
         train_ratings, users, items, graph_embeddings, bert_embeddings,
@@ -287,6 +599,9 @@ def load_user_item_graph(
     """
     Load train and test ratings for GNN-based models.
     Note that the user and item IDs are converted to sequential numbers.
+    Note also that sparse adjacency matrices are always in CSR format with int32 indices and float32 data.
+    The sparse_adjacency=False path should only be used for debugging, since a dense matrix over all
+    users and items does not scale.
 
     :param train_ratings_filepath: The training ratings CSV or TSV filepath.
     :param test_ratings_filepath: The test ratings CSV or TSV filepath.
@@ -393,7 +708,8 @@ def load_user_item_graph_bert_embeddings(
         shuffle=True,
         train_batch_size=1024,
         test_batch_size=2048,
-        user_properties=None):
+        user_properties=None,
+        embedding_dtype='float32'):
     """
     Load train and test ratings for GNN-based models.
     Note that the user and item IDs are converted to sequential numbers.
@@ -413,6 +729,7 @@ def load_user_item_graph_bert_embeddings(
     :param shuffle: Tells if shuffle the training dataset.
     :param train_batch_size: batch_size used in training phase.
     :param test_batch_size: batch_size used in test phase.
+    :param embedding_dtype: The dtype used to store the embeddings, e.g. 'float32' or 'bfloat16'.
     :return: The training and test ratings data sequence for GNN-based models.
     """
     (train_ratings, test_ratings), (users, items), adj_matrix = \
@@ -424,13 +741,15 @@ def load_user_item_graph_bert_embeddings(
                                 type_adjacency=type_adjacency,
                                 sparse_adjacency=sparse_adjacency,
                                 symmetric_adjacency=symmetric_adjacency)
+
+    # The BERT loader parses its two files concurrently, and skips parsing on a cache hit
+    bert_embeddings = load_bert_user_item_embeddings(bert_user_filepath, bert_item_filepath, users, items,
+                                                     embedding_dtype=embedding_dtype)
     if user_properties and type_adjacency != 'unary-uip':
         ui_adj, ip_adj = adj_matrix
         user_properties_adj = get_user_properties(ui_adj, ip_adj, len(users), len(items))
         adj_matrix = (ui_adj, ip_adj, user_properties_adj)
 
-    bert_embeddings = load_bert_user_item_embeddings(bert_user_filepath, bert_item_filepath, users, items)
-
     data_train = UserItemGraphEmbeddings(
         train_ratings, users, items, adj_matrix, bert_embeddings,
         batch_size=train_batch_size, shuffle=shuffle
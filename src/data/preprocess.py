@@ -19,6 +19,8 @@ def get_user_properties(ui_adj, ip_adj, n_users, n_items):
     n_properties = ip_adj.shape[0] - n_items
 
     # Build the user-item-properties adjacency matrix
+    # Note converting to COO first, since the loaders hand over CSR matrices
+    ui_adj, ip_adj = ui_adj.tocoo(), ip_adj.tocoo()
     ui_rows, ui_cols = ui_adj.row, ui_adj.col
     ip_rows, ip_cols = ip_adj.row, ip_adj.col
     ip_rows = ip_rows + n_users
@@ -180,21 +180,45 @@ class Experimenter:
         self.build_model()
 
         self.logger.info('Training:')
-        self.model.fit(
-            self.trainset,
-            epochs=self.parameters.epochs,
-            workers=self.config.n_workers,
-            callbacks=[LogCallback(self.logger, LOG_FREQUENCY)]
-        )
+
+        # Prefer the tf.data pipeline when available, so that batching and prefetching
+        # run in the TF runtime instead of the Python-level Sequence
+        if hasattr(self.trainset, 'to_dataset'):
+            self.model.fit(
+                self.trainset.to_dataset(),
+                epochs=self.parameters.epochs,
+                callbacks=[LogCallback(self.logger, LOG_FREQUENCY)]
+            )
+        else:
+            self.model.fit(
+                self.trainset,
+                epochs=self.parameters.epochs,
+                workers=self.config.n_workers,
+                callbacks=[LogCallback(self.logger, LOG_FREQUENCY)]
+            )
 
     def evaluate(self):
         """
         Evaluates the trained model
         """
-        self.model.evaluate(self.testset)
+        # Prefer the tf.data pipeline when available (test batches are never shuffled,
+        # hence predictions stay aligned with the test ratings)
+        if hasattr(self.testset, 'to_dataset'):
+            testset = self.testset.to_dataset()
+        else:
+            testset = self.testset
+        self.model.evaluate(testset)
 
         # Compute Precision, Recall and F1 @K metrics
-        predictions = self.model.predict(self.testset)
+        # GNN recommenders propagate the full graph once and score every test batch with
+        # the lookup-only head: the propagation depends on the weights alone, so repeating
+        # it per batch inside predict would just recompute the same embeddings
+        if isinstance(self.model, BasicGNN):
+            embeddings = self.model.propagate_embeddings()
+            predictions = np.concatenate(
+                [self.model.embed_recommend(embeddings, inputs).numpy() for inputs, _ in testset])
+        else:
+            predictions = self.model.predict(testset)
         ratings_pred = np.concatenate([self.testset.ratings[:, [0, 1]], predictions], axis=1)
         precision_at, recall_at, f1_at = {}, {}, {}
 
@@ -0,0 +1,40 @@
+from spektral.layers import GCNConv, ops
+
+import tensorflow as tf
+
+
+class AdaptiveGCNConv(GCNConv):
+    r"""
+    A graph convolutional layer (GCN) that exploits the associativity of \( \A \X \W \).
+
+    The standard GCNConv always computes \( \A (\X \W) \). The cost of the dense product
+    is the same in both orderings, while the sparse product touches nnz times the width
+    of its dense operand: when the layer shrinks the features (channels < n_node_features)
+    the dense product should go first, and when it widens them the sparse product should.
+    This layer picks the cheaper ordering once at build time from the static shapes.
+    """
+
+    def build(self, input_shape):
+        super().build(input_shape)
+
+        # Multiply by the kernel first whenever it does not widen the features
+        n_node_features = input_shape[0][-1]
+        self._kernel_first = n_node_features is None or self.channels <= n_node_features
+
+    def call(self, inputs, mask=None):
+        x, a = inputs
+
+        if self._kernel_first:
+            output = tf.matmul(x, self.kernel)
+            output = ops.modal_dot(a, output)
+        else:
+            output = ops.modal_dot(a, x)
+            output = tf.matmul(output, self.kernel)
+
+        if self.use_bias:
+            output = tf.nn.bias_add(output, self.bias)
+        if mask is not None:
+            output *= mask[0]
+        output = self.activation(output)
+
+        return output
@@ -1,6 +1,9 @@
 from spektral.layers import ops
 from spektral.layers.convolutional.conv import Conv
 from spektral.utils import gcn_filter
+from scipy import sparse
+
+from utilities.math import sym_normalize_csr
 
 
 class LightGCNConv(Conv):
@@ -55,4 +58,8 @@ class LightGCNConv(Conv):
 
     @staticmethod
     def preprocess(a):
+        # Normalize sparse adjacencies with the fused CSR kernel; gcn_filter deep-copies
+        # the matrix and allocates one intermediate per product
+        if sparse.issparse(a):
+            return sym_normalize_csr(a)
         return gcn_filter(a)
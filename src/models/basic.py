@@ -1,6 +1,6 @@
 import abc
 import tensorflow as tf
-from tensorflow.keras import models, layers
+from tensorflow.keras import models
 
 from models.dense import build_dense_network, build_dense_classifier
 from models.gnn import GCN, GAT, GraphSage, LightGCN, DGCF
@@ -23,16 +23,16 @@ class BasicRS(models.Model):
         :param **kwargs: Additional args not used.
         """
         super().__init__()
-        self.concat = layers.Concatenate()
         self.unet = build_dense_network(dense_units, activation=activation)
         self.inet = build_dense_network(dense_units, activation=activation)
         self.clf = build_dense_classifier(clf_units, n_classes=1, activation=activation)
 
+    @tf.function(jit_compile=True, reduce_retracing=True)
     def call(self, inputs, **kwargs):
         u, i = inputs
         u = self.unet(u)
         i = self.inet(i)
-        x = self.concat([u, i])
+        x = tf.concat([u, i], axis=-1)
         out = self.clf(x)
         return out
 
@@ -58,10 +58,26 @@ class BasicGNN(abc.ABC, models.Model):
         # Build the Basic recommender system
         self.rs = BasicRS(dense_units, clf_units, activation=activation)
 
+        # Pre-compiled propagation function, set by the factory of each concrete variant
+        self._propagate = None
+
     def call(self, inputs, **kwargs):
-        updated_embeddings = self.gnn(None)
-        return self.embed_recommend(updated_embeddings, inputs)
+        return self.embed_recommend(self.propagate_embeddings(), inputs)
+
+    def propagate_embeddings(self):
+        """
+        Run the full-graph propagation and return the updated node embeddings.
+
+        The output depends on the model weights only, not on the batch: an inference
+        pass over many batches can call this once and score every batch through
+        embed_recommend, instead of repeating the propagation per batch.
 
+        :return: The updated node embeddings.
+        """
+        propagate = self._propagate if self._propagate is not None else self.gnn
+        return propagate(None)
+
+    @tf.function(reduce_retracing=True)
     def embed_recommend(self, embeddings, inputs):
         """
         Lookup for user and item representations and pass through the recommender model
@@ -92,6 +108,10 @@ def BasicGNNFactory(name, Parent, GNN):
         Parent.__init__(self, **kwargs)
         self.gnn = self.gnn_class(*args, **kwargs)
 
+        # Pre-compile the propagation of this concrete variant, so the GNN stack is traced
+        # once per instance instead of being dispatched layer by layer in Python
+        self._propagate = tf.function(self.gnn, reduce_retracing=True)
+
     basic_gnn = type(name, (Parent,), {"gnn_class": GNN, "__init__": __init__})
     return basic_gnn
 
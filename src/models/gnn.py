@@ -25,7 +25,7 @@ class SequentialGNN(models.Model):
         Initialize a sequence of Graph Neural Networks (GNNs) layers.
 
         :param adj_matrix: The graph adjacency matrix. It can be either sparse or dense.
-        :param seq_layers: A list of GNN layers.
+        :param seq_layers: A list of GNN layers, or a Keras Sequential wrapping them.
         :param embedding_dim: The dimension of latent features representations of user and items.
         :param final_node: Defines how the final node will be represented from layers. One between the following:
                            'concatenation', 'sum', 'mean', 'w-sum', 'last'.
@@ -62,7 +62,12 @@ class SequentialGNN(models.Model):
         self.reduce = ReductionLayer(final_node)
 
         # Build GNN layers
-        self.seq_layers = seq_layers
+        # Note a Keras Sequential is accepted but unwrapped: every hop consumes [x, a]
+        # and the reduction needs all the intermediate outputs, hence the layers cannot
+        # be chained as a single Sequential call
+        if isinstance(seq_layers, models.Sequential):
+            seq_layers = seq_layers.layers
+        self.seq_layers = tuple(seq_layers)
 
     @property
     def n_hops(self):
@@ -93,7 +98,7 @@ class HalfInputSequentialGNN(models.Model):
        Initialize a sequence of Graph Neural Networks (GNNs) layers which embeddings are given in input.
 
        :param adj_matrix: The graph adjacency matrix. It can be either sparse or dense.
-       :param seq_layers: A list of GNN layers.
+       :param seq_layers: A list of GNN layers, or a Keras Sequential wrapping them.
        :param final_node: Defines how the final node will be represented from layers. One between the following:
                           'concatenation', 'sum', 'mean', 'w-sum', 'last'.
        :param dropout: The dropout to apply after each GCN layer. It can be None.
@@ -129,7 +134,12 @@ class HalfInputSequentialGNN(models.Model):
         self.reduce = ReductionLayer(final_node)
 
         # Build GNN layers
-        self.seq_layers = seq_layers
+        # Note a Keras Sequential is accepted but unwrapped: every hop consumes [x, a]
+        # and the reduction needs all the intermediate outputs, hence the layers cannot
+        # be chained as a single Sequential call
+        if isinstance(seq_layers, models.Sequential):
+            seq_layers = seq_layers.layers
+        self.seq_layers = tuple(seq_layers)
 
     @property
     def n_hops(self):
@@ -158,7 +168,7 @@ class FullInputSequentialGNN(models.Model):
        Initialize a sequence of Graph Neural Networks (GNNs) layers which embeddings are given in input.
 
        :param adj_matrix: The graph adjacency matrix. It can be either sparse or dense.
-       :param seq_layers: A list of GNN layers.
+       :param seq_layers: A list of GNN layers, or a Keras Sequential wrapping them.
        :param final_node: Defines how the final node will be represented from layers. One between the following:
                           'concatenation', 'sum', 'mean', 'w-sum', 'last'.
        :param dropout: The dropout to apply after each GCN layer. It can be None.
@@ -186,7 +196,12 @@ class FullInputSequentialGNN(models.Model):
         self.reduce = ReductionLayer(final_node)
 
         # Build GNN layers
-        self.seq_layers = seq_layers
+        # Note a Keras Sequential is accepted but unwrapped: every hop consumes [x, a]
+        # and the reduction needs all the intermediate outputs, hence the layers cannot
+        # be chained as a single Sequential call
+        if isinstance(seq_layers, models.Sequential):
+            seq_layers = seq_layers.layers
+        self.seq_layers = tuple(seq_layers)
 
     @property
     def n_hops(self):
@@ -1,11 +1,74 @@
 import abc
+import hashlib
 
+import numpy as np
+import tensorflow as tf
+from scipy import sparse
 from spektral.layers import GCNConv, GraphSageConv, GATConv
 from tensorflow.keras import models, regularizers
 
 from layers.dgcf_conv import DGCFConv
+from layers.gcn_conv import AdaptiveGCNConv
 from layers.lightgcn_conv import LightGCNConv
 from models.gnn import SequentialGNN, HalfInputSequentialGNN
+from utilities.math import convert_to_tensor, to_csr32
+
+
+# In-process cache of normalized adjacency tensors, shared by every TwoStep* instance
+# of a hyper-parameter sweep (the matrices are the same across all its configurations)
+_adjacency_cache = dict()
+
+
+def clear_adjacency_cache():
+    """
+    Empty the cache of normalized adjacency tensors.
+
+    To be called between datasets, since a newly loaded matrix may reuse the memory
+    address of a discarded one.
+    """
+    _adjacency_cache.clear()
+
+
+def _adjacency_cache_key(preprocess, matrix):
+    if sparse.isspmatrix_csr(matrix):
+        # Fingerprint CSR matrices by content, so cross-validation folds rebuilding the
+        # model from equal but distinct matrix objects still hit the cache
+        fingerprint = hashlib.sha1()
+        fingerprint.update(np.ascontiguousarray(matrix.indptr))
+        fingerprint.update(np.ascontiguousarray(matrix.indices))
+        fingerprint.update(np.ascontiguousarray(matrix.data))
+        return preprocess.__qualname__, matrix.shape, fingerprint.hexdigest()
+    nnz = matrix.nnz if sparse.issparse(matrix) else -1
+    return preprocess.__qualname__, id(matrix), matrix.shape, nnz
+
+
+def preprocess_adjacency(preprocess, adj_matrices):
+    """
+    Normalize each adjacency matrix once and convert it to a reordered SparseTensor.
+
+    The adjacency structure is fixed throughout training, hence the degree normalization,
+    the CSR conversion and the sparse descriptor build (including tf.sparse.reorder) are
+    paid a single time at construction, and every SpMM of every epoch reuses the result.
+    The tensors are also cached at module level, so the instances of a hyper-parameter
+    sweep sharing the same matrices pay the preprocessing only on the first one.
+
+    :param preprocess: The preprocess function of the convolution (e.g. GCNConv.preprocess).
+    :param adj_matrices: The adjacency matrices, either sparse or dense.
+    :return: The list of normalized adjacency tensors.
+    """
+    tensors = []
+    for matrix in adj_matrices:
+        key = _adjacency_cache_key(preprocess, matrix)
+        tensor = _adjacency_cache.get(key)
+        if tensor is None:
+            # Densely stored but structurally sparse graphs take the sparse path, so
+            # every hop runs an SpMM instead of a full NxN dense product
+            if not sparse.issparse(matrix) and np.count_nonzero(matrix) < 0.1 * matrix.size:
+                matrix = sparse.csr_matrix(matrix)
+            tensor = convert_to_tensor(to_csr32(preprocess(matrix)), dtype=tf.float32)
+            _adjacency_cache[key] = tensor
+        tensors.append(tensor)
+    return tensors
 
 
 class TwoStepGNN(abc.ABC, models.Model):
@@ -21,6 +84,7 @@ class TwoStepGNN(abc.ABC, models.Model):
         dropout=None,
         l2_regularizer=None,
         cache_neighbours=False,
+        mixed_precision=False,
         **kwargs
     ):
         """
@@ -35,6 +99,8 @@ class TwoStepGNN(abc.ABC, models.Model):
         :param l2_regularizer: L2 factor to apply on embeddings and GCN layers' weights. It can be None.
         :param cache_neighbours: Whether to pre-compute and cache the neighbours of each node. This is useful only
                                  if the adjacency matrix is very sparse and n_hops is relatively small.
+        :param mixed_precision: Whether to compute the GNN stacks in bfloat16 (with float32 weights).
+                                Halves the bytes moved by the bandwidth-bound propagation.
         :param **kwargs: Additional args not used.
         """
         super().__init__()
@@ -49,36 +115,47 @@ class TwoStepGNN(abc.ABC, models.Model):
             raise ValueError('Exactly two adjacency matrix are needed!')
         adj_ui_matrix, adj_kg_matrix = adj_matrices
 
-        # Build the first sequential GNN model
-        gnn_kwargs = {'regularizer': regularizer}
-        step_one_gnn_layers = [self.build_gnn_layer(i, **gnn_kwargs) for i in range(n_hops)]
-        self.step_one_gnn_layers = SequentialGNN(
-            adj_kg_matrix, step_one_gnn_layers,
-            embedding_dim=embedding_dim, final_node=item_node,
-            dropout=dropout, regularizer=regularizer, cache_neighbours=cache_neighbours
-        )
-
-        # Get the slice of item embeddings
-        self.n_embeddings = n_items
-
-        # Build the second sequential model
-        # Get the number of hiddens for the second GNN
-        if hasattr(self, 'n_hiddens'):
-            if n_hops == len(self.n_hiddens):
-                if item_node == 'concatenation':
-                    second_embedding_dim = embedding_dim * (n_hops + 1)
-                    self.n_hiddens.extend([second_embedding_dim for _ in range(n_hops)])
-                else:
-                    self.n_hiddens.extend([embedding_dim for _ in range(n_hops)])
-                    second_embedding_dim = embedding_dim
-        else:
-            second_embedding_dim = embedding_dim
-        step_two_gnn_layers = [self.build_gnn_layer(i + n_hops, **gnn_kwargs) for i in range(n_hops)]
-        self.step_two_gnn_layers = HalfInputSequentialGNN(
-            adj_ui_matrix, step_two_gnn_layers, n_users,
-            embedding_dim=second_embedding_dim, final_node=final_node,
-            dropout=dropout, cache_neighbours=cache_neighbours
-        )
+        # Build the GNN stacks under the mixed bfloat16 policy, if requested: the layers
+        # keep float32 weights but cast their computations (and activations) to bfloat16
+        self.mixed_precision = mixed_precision
+        previous_policy = tf.keras.mixed_precision.global_policy()
+        if mixed_precision:
+            tf.keras.mixed_precision.set_global_policy('mixed_bfloat16')
+
+        try:
+            # Build the first sequential GNN model
+            gnn_kwargs = {'regularizer': regularizer}
+            step_one_gnn_layers = [self.build_gnn_layer(i, **gnn_kwargs) for i in range(n_hops)]
+            self.step_one_gnn_layers = SequentialGNN(
+                adj_kg_matrix, step_one_gnn_layers,
+                embedding_dim=embedding_dim, final_node=item_node,
+                dropout=dropout, regularizer=regularizer, cache_neighbours=cache_neighbours
+            )
+
+            # Get the slice of item embeddings
+            self.n_embeddings = n_items
+
+            # Build the second sequential model
+            # Get the number of hiddens for the second GNN
+            if hasattr(self, 'n_hiddens'):
+                if n_hops == len(self.n_hiddens):
+                    if item_node == 'concatenation':
+                        second_embedding_dim = embedding_dim * (n_hops + 1)
+                        self.n_hiddens.extend([second_embedding_dim for _ in range(n_hops)])
+                    else:
+                        self.n_hiddens.extend([embedding_dim for _ in range(n_hops)])
+                        second_embedding_dim = embedding_dim
+            else:
+                second_embedding_dim = embedding_dim
+            step_two_gnn_layers = [self.build_gnn_layer(i + n_hops, **gnn_kwargs) for i in range(n_hops)]
+            self.step_two_gnn_layers = HalfInputSequentialGNN(
+                adj_ui_matrix, step_two_gnn_layers, n_users,
+                embedding_dim=second_embedding_dim, final_node=final_node,
+                dropout=dropout, cache_neighbours=cache_neighbours
+            )
+        finally:
+            if mixed_precision:
+                tf.keras.mixed_precision.set_global_policy(previous_policy)
 
     @abc.abstractmethod
     def build_gnn_layer(self, i, **kwargs):
@@ -90,9 +167,15 @@ class TwoStepGNN(abc.ABC, models.Model):
         """
         pass
 
+    @tf.function(reduce_retracing=True)
     def call(self, inputs, **kwargs):
+        # A single traced graph spanning both stacks, so the slice and the layer
+        # dispatching do not bounce back to Python at every step
         x = self.step_one_gnn_layers(None)
-        return self.step_two_gnn_layers(x[:self.n_embeddings])
+        x = self.step_two_gnn_layers(x[:self.n_embeddings])
+
+        # The recommender head and the loss always work in full precision
+        return tf.cast(x, tf.float32)
 
 
 class TwoStepGCN(TwoStepGNN):
@@ -112,8 +195,8 @@ class TwoStepGCN(TwoStepGNN):
         """
         self.n_hiddens = n_hiddens
 
-        # Note normalizing the adjacency matrix using the GCN filter
-        adj_matrices = [GCNConv.preprocess(matrix) for matrix in adj_matrices]
+        # Note normalizing the adjacency matrix using the GCN filter, once at construction
+        adj_matrices = preprocess_adjacency(GCNConv.preprocess, adj_matrices)
         super().__init__(
             n_users,
             n_items,
@@ -122,7 +205,7 @@ class TwoStepGCN(TwoStepGNN):
             **kwargs)
 
     def build_gnn_layer(self, i, regularizer=None, **kwargs):
-        return GCNConv(
+        return AdaptiveGCNConv(
             self.n_hiddens[i],
             activation='relu',
             kernel_regularizer=regularizer,
@@ -222,8 +305,8 @@ class TwoStepLightGCN(TwoStepGNN):
         # Override final_node parameter to 'mean'
         kwargs['final_node'] = 'mean'
 
-        # Note normalizing the adjacency matrix using the GCN filter
-        adj_matrix = [LightGCNConv.preprocess(matrix ) for matrix in adj_matrix]
+        # Note normalizing the adjacency matrix using the GCN filter, once at construction
+        adj_matrix = preprocess_adjacency(LightGCNConv.preprocess, adj_matrix)
         super().__init__(
             n_users,
             n_items,
@@ -253,8 +336,9 @@ class TwoStepDGCF(TwoStepGNN):
         # Override final_node parameter to 'mean'
         kwargs['final_node'] = 'mean'
 
-        # Note normalizing the adjacency matrix using the GCN filter and getting the crosshop matrix
-        crosshop_matrix = [DGCFConv.preprocess(matrix) for matrix in adj_matrix]
+        # Note normalizing the adjacency matrix using the GCN filter and getting the crosshop
+        # matrix, once at construction
+        crosshop_matrix = preprocess_adjacency(DGCFConv.preprocess, adj_matrix)
         super().__init__(
             n_users,
             n_items,
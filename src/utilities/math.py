@@ -2,6 +2,55 @@ import numpy as np
 import tensorflow as tf
 from scipy import sparse
 
+try:
+    import numba
+except ImportError:
+    numba = None
+
+
+if numba is not None:
+    @numba.njit(cache=True)
+    def _coo_to_csr(rows, cols, data, n_nodes):
+        nnz = len(rows)
+
+        # Count the degree of each node and prefix-sum into the indptr array
+        indptr = np.zeros(n_nodes + 1, dtype=np.int32)
+        for k in range(nnz):
+            indptr[rows[k] + 1] += 1
+        for i in range(n_nodes):
+            indptr[i + 1] += indptr[i]
+
+        # Scatter the column indices and the data into their rows
+        indices = np.empty(nnz, dtype=np.int32)
+        values = np.empty(nnz, dtype=np.float32)
+        cursor = indptr[:-1].copy()
+        for k in range(nnz):
+            row = rows[k]
+            indices[cursor[row]] = cols[k]
+            values[cursor[row]] = data[k]
+            cursor[row] += 1
+        return indptr, indices, values
+
+    @numba.njit(parallel=True, fastmath=True, cache=True)
+    def _sym_normalize_values(indptr, indices, data, out):
+        n_nodes = len(indptr) - 1
+
+        # Compute the inverse square-root degree of each node, one row per thread
+        inv_sqrt_deg = np.empty(n_nodes, dtype=np.float32)
+        for i in numba.prange(n_nodes):
+            deg = 0.0
+            for k in range(indptr[i], indptr[i + 1]):
+                deg += data[k]
+            inv_sqrt_deg[i] = 1.0 / np.sqrt(deg) if deg > 0.0 else 0.0
+
+        # Scale every stored value by both endpoint degrees in place
+        for i in numba.prange(n_nodes):
+            for k in range(indptr[i], indptr[i + 1]):
+                out[k] = data[k] * inv_sqrt_deg[i] * inv_sqrt_deg[indices[k]]
+else:
+    _coo_to_csr = None
+    _sym_normalize_values = None
+
 
 def symmetrize_matrix(x):
     """
@@ -11,6 +60,18 @@ def symmetrize_matrix(x):
     :return: The resulting symmetric matrix.
     """
     if sparse.issparse(x):
+        if x.nnz == 0 or x.data.all():
+            # Mirror the matrix with Scipy's C-level transpose sum, instead of materializing
+            # doubled COO arrays (which would peak at twice the memory before coalescing)
+            x = x.tocsr()
+            x_sym = x + x.T
+            x_sym.sum_duplicates()
+            return x_sym
+
+        # Explicitly stored zeros (e.g. the negative ratings of 'binary' adjacencies, which
+        # the negative samplers rely on) would be dropped by the CSR addition, hence they
+        # take the original doubled-COO mirroring
+        x = x.tocoo()
         coo_data = np.concatenate([x.data, x.data])
         coo_rows = np.concatenate([x.row, x.col])
         coo_cols = np.concatenate([x.col, x.row])
@@ -21,6 +82,91 @@ def symmetrize_matrix(x):
     return np.maximum(x, x.T)
 
 
+def to_csr32(x):
+    """
+    Convert a matrix (either dense or sparse) to CSR format with 32-bit arrays.
+
+    The CSR (indptr, indices, data) layout is the canonical format for sparse matrix
+    products and graph traversals, and 32-bit indices halve the bytes moved with
+    respect to Scipy's default 64-bit ones.
+
+    :param x: The input matrix. Dense matrices are returned unchanged.
+    :return: The resulting CSR matrix with int32 indices and float32 data.
+    """
+    if not sparse.issparse(x):
+        return x
+    if _coo_to_csr is not None and sparse.isspmatrix_coo(x):
+        # Build the CSR arrays with the JIT-compiled count/prefix-sum/scatter kernel
+        indptr, indices, data = _coo_to_csr(x.row, x.col, x.data.astype(np.float32, copy=False), x.shape[0])
+        x = sparse.csr_matrix((data, indices, indptr), shape=x.shape)
+        x.sort_indices()
+        return x
+    x = x.tocsr()
+    x.indptr = x.indptr.astype(np.int32, copy=False)
+    x.indices = x.indices.astype(np.int32, copy=False)
+    x.data = x.data.astype(np.float32, copy=False)
+    return x
+
+
+def pack_csr(matrices):
+    """
+    Repack a sequence of CSR matrices into two shared contiguous buffers.
+
+    All the indptr and indices arrays are copied back to back into one int32 arena and
+    all the data arrays into one float32 arena, and each matrix is rebuilt on views of
+    its slices. Matrices that are traversed together (e.g. the user-item and the
+    knowledge-graph adjacency of a two-step model) then sit on adjacent pages instead
+    of wherever their intermediate computations left them.
+
+    :param matrices: A sequence of CSR matrices with int32 indices and float32 data.
+    :return: The list of repacked CSR matrices.
+    """
+    structure = np.empty(sum(len(x.indptr) + len(x.indices) for x in matrices), dtype=np.int32)
+    values = np.empty(sum(len(x.data) for x in matrices), dtype=np.float32)
+
+    packed, s_offset, v_offset = [], 0, 0
+    for x in matrices:
+        indptr = structure[s_offset:s_offset + len(x.indptr)]
+        indptr[:] = x.indptr
+        s_offset += len(x.indptr)
+        indices = structure[s_offset:s_offset + len(x.indices)]
+        indices[:] = x.indices
+        s_offset += len(x.indices)
+        data = values[v_offset:v_offset + len(x.data)]
+        data[:] = x.data
+        v_offset += len(x.data)
+        packed.append(sparse.csr_matrix((data, indices, indptr), shape=x.shape))
+    return packed
+
+
+def sym_normalize_csr(x, add_self_loops=True):
+    """
+    Symmetrically normalize a sparse adjacency matrix, i.e. compute \\(D^{-1/2} \\hat A D^{-1/2}\\).
+
+    Equivalent to Spektral's gcn_filter on sparse inputs, but implemented as two passes
+    over the CSR arrays (parallelized across rows when Numba is available) instead of a
+    chain of Scipy products, each of which allocates an intermediate matrix.
+
+    :param x: The sparse adjacency matrix.
+    :param add_self_loops: Whether to add the identity before normalizing.
+    :return: The normalized CSR matrix with int32 indices and float32 data.
+    """
+    assert sparse.issparse(x), "The input matrix should be sparse"
+    if add_self_loops:
+        x = x + sparse.eye(x.shape[0], dtype=np.float32, format='csr')
+    x = to_csr32(x)
+    if _sym_normalize_values is not None:
+        out = np.empty_like(x.data)
+        _sym_normalize_values(x.indptr, x.indices, x.data, out)
+    else:
+        degrees = np.asarray(x.sum(axis=1)).ravel()
+        with np.errstate(divide='ignore'):
+            inv_sqrt_deg = np.where(degrees > 0.0, 1.0 / np.sqrt(degrees), 0.0).astype(np.float32)
+        rows = np.repeat(np.arange(x.shape[0]), np.diff(x.indptr))
+        out = x.data * inv_sqrt_deg[rows] * inv_sqrt_deg[x.indices]
+    return sparse.csr_matrix((out, x.indices, x.indptr), shape=x.shape)
+
+
 def convert_to_tensor(x, dtype=tf.float32):
     """
     Convert array (either dense or sparse) to a tensor.
@@ -29,6 +175,8 @@ def convert_to_tensor(x, dtype=tf.float32):
     :param dtype: The output tensor dtype.
     :return: The resulting tensor.
     """
+    if isinstance(x, tf.sparse.SparseTensor):
+        return tf.cast(x, dtype)
     if sparse.issparse(x):
         return sparse_matrix_to_tensor(x, dtype=dtype)
     return tf.convert_to_tensor(x, dtype=dtype)
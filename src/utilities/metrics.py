@@ -27,11 +27,10 @@ def top_k_predictions(predictions, users, items, k=5):
     predictions = df.sort_values(by=['users', 'scores'], ascending=[True, False])
 
     # Compute the top K predictions based on scores
-    top_k_scores = pd.DataFrame()
-    for u in set(predictions['users']):
-        p = predictions.loc[predictions['users'] == u]
-        top_k_scores = top_k_scores.append(p.head(k))
-    return top_k_scores
+    # Note a single hash-based grouping pass replaces one full-column scan (and one
+    # append reallocation) per user; rows are already sorted by user and score
+    groups = predictions.groupby('users', sort=False).indices
+    return pd.concat([predictions.iloc[idx[:k]] for idx in groups.values()], copy=False)
 
 
 def top_k_metrics(test_filepath, predictions_path):
@@ -1,7 +1,10 @@
 import logging
 import os
-from itertools import groupby, product
+import queue
+import time
+from itertools import product
 from logging import FileHandler, LogRecord
+from logging.handlers import QueueHandler, QueueListener
 
 import mlflow
 import pandas as pd
@@ -9,11 +12,15 @@ import collections
 
 
 def top_scores(predictions, n):
-    top_n_scores = pd.DataFrame()
-    for u in list(set(predictions['users'])):
-        p = predictions.loc[predictions['users'] == u]
-        top_n_scores = top_n_scores.append(p.head(n))
-    return top_n_scores
+    """
+    Select the first n predictions of every user.
+
+    :param predictions: The predictions data frame, with a 'users' column.
+    :param n: The number of rows to keep per user.
+    :return: The filtered data frame.
+    """
+    # A single C-level grouping pass, instead of one boolean scan and one append per user
+    return predictions.groupby('users', sort=False).head(n)
 
 
 def nested_dict_update(d, u):
@@ -23,11 +30,21 @@ def nested_dict_update(d, u):
     :param u: dict from where updates are taken
     :return: Updated dictionary
     """
-    for k, v in u.items():
-        if isinstance(v, collections.abc.Mapping):
-            d[k] = nested_dict_update(d.get(k, {}), v)
-        else:
-            d[k] = v
+    # Walk the pairs of nested dictionaries with an explicit stack, avoiding one Python
+    # frame per nesting level
+    stack = [(d, u)]
+    while stack:
+        target, updates = stack.pop()
+        for k, v in updates.items():
+            # Note the pointer compare short-circuits the Mapping MRO walk on plain dicts
+            if v.__class__ is dict or isinstance(v, collections.abc.Mapping):
+                child = target.get(k)
+                if not isinstance(child, collections.abc.Mapping):
+                    child = {}
+                    target[k] = child
+                stack.append((child, v))
+            else:
+                target[k] = v
     return d
 
 
@@ -38,13 +55,16 @@ def linearize(dictionary):
     :return: one level dict
     """
     exps = []
-    for key, value in dictionary.items():
-        if isinstance(value, collections.abc.Mapping):
-            exps.extend(((key, lin_key), lin_value) for lin_key, lin_value in linearize(value))
-        elif isinstance(value, list):
-            exps.append((key, value))
-        else:
-          raise ValueError("Only dict or lists!!!")
+    stack = collections.deque([((), dictionary)])
+    while stack:
+        prefix, d = stack.popleft()
+        for key, value in d.items():
+            if value.__class__ is dict or isinstance(value, collections.abc.Mapping):
+                stack.append((prefix + (key,), value))
+            elif isinstance(value, list):
+                exps.append((extract(prefix + (key,)), value))
+            else:
+                raise ValueError("Only dict or lists!!!")
     return exps
 
 
@@ -65,38 +85,79 @@ def delinearize(lin_dict):
     :param lin_dict: dicionary where keys can be tuples
     :return:
     """
-    # Take keys that are tuples
-    filtered = list(filter(lambda x: isinstance(x[0], tuple), lin_dict.items()))
-    # Group it to make one level
-    grouped = groupby(filtered, lambda x: x[0][0])
-    # Create the new dict and apply recursively
-    new_dict = {k: delinearize({extract(elem[0][1:]): elem[1] for elem in v}) for k, v in grouped}
-    # Remove old items and put new ones
-    for key, value in filtered:
-        lin_dict.pop(key)
-    delin_dict = {**lin_dict, **new_dict}
+    # Walk (and create on demand) the nested levels of each tuple key in a single pass,
+    # which also merges tuple keys sharing a prefix even when they are not adjacent
+    delin_dict = {}
+    for key, value in lin_dict.items():
+        if isinstance(key, tuple):
+            d = delin_dict
+            for part in key[:-1]:
+                d = d.setdefault(part, {})
+            d[key[-1]] = value
+        else:
+            delin_dict[key] = value
     return delin_dict
 
 
 def make_grid(dict_of_list):
     """
-    Produce a list of dict for each combination of values in the input dict given by the list of values
+    Produce a dict for each combination of values in the input dict given by the list of values
     :param dict_of_list: a dictionary where values can be lists
-    :return: a list of dictionaries given by the cartesian product of values in the input dictionary
+    :return: a generator of dictionaries given by the cartesian product of values in the input dictionary
     """
     # Linearize the dict to make the cartesian product straight forward
     linearized_dict = linearize(dict_of_list)
-    # Compute the grid
+    # Compute the grid lazily, so only one combination is materialized at a time
     keys, values = zip(*linearized_dict)
-    grid_dict = list(dict(zip(keys, values_list)) for values_list in product(*values))
-    # Delinearize the list of dicts
-    return [delinearize(dictionary) for dictionary in grid_dict]
+    return (delinearize(dict(zip(keys, values_list))) for values_list in product(*values))
 
 
 class FlushFileHandler(FileHandler):
+    """
+    A file handler flushing every few records, or after at most a second, instead of
+    paying a flush syscall on every single record.
+    """
+
+    FLUSH_EVERY = 64
+    FLUSH_SECONDS = 1.0
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
     def emit(self, record: LogRecord) -> None:
         super().emit(record)
-        self.flush()
+        self._pending += 1
+        if self._pending >= self.FLUSH_EVERY or time.monotonic() - self._last_flush >= self.FLUSH_SECONDS:
+            self.flush()
+
+    def flush(self) -> None:
+        super().flush()
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+
+class BackgroundLogHandler(QueueHandler):
+    """
+    A queue handler forwarding records to a target handler on a background thread, so
+    the training loop never blocks on log writes.
+    """
+
+    def __init__(self, target):
+        super().__init__(queue.Queue(-1))
+        self.listener = QueueListener(self.queue, target)
+        self.listener.start()
+        self._closed = False
+
+    def close(self) -> None:
+        # Note stopping the listener drains the queue before the target is closed
+        if not self._closed:
+            self._closed = True
+            self.listener.stop()
+            for handler in self.listener.handlers:
+                handler.close()
+        super().close()
 
 
 def setup_mlflow(exp_name, mlflow_path):
@@ -113,12 +174,20 @@ def setup_mlflow(exp_name, mlflow_path):
 
     experiment = mlflow.get_experiment_by_name(exp_name)
     if not experiment:
-        exps = os.listdir(mlflow_path)
-        exps.pop(exps.index('.trash'))
-        if len(exps) == 0:
-            exp_id = '0'
-        else:
-            exp_id = str(max([int(exp) for exp in exps]) + 1)
+        # Scan for the highest experiment id in a single pass, without materializing
+        # the directory listing; non-numeric entries (e.g. '.trash') are skipped
+        max_id = -1
+        with os.scandir(mlflow_path) as entries:
+            for entry in entries:
+                if not entry.is_dir():
+                    continue
+                try:
+                    entry_id = int(entry.name)
+                except ValueError:
+                    continue
+                if entry_id > max_id:
+                    max_id = entry_id
+        exp_id = str(max_id + 1)
         exp_path = mlflow_path + '/' + exp_id
         experiment_id = mlflow.create_experiment(
             exp_name, artifact_location='file:' + exp_path)
@@ -136,13 +205,18 @@ def mlflow_linearize(dictionary):
     :param dictionary: nested dict
     :return: one level dict
     """
+    # Fill a single output dict in place, instead of rebuilding it with a {**a, **b}
+    # merge for every nested key
     exps = {}
-    for key, value in dictionary.items():
-        if isinstance(value, collections.abc.Mapping):
-            exps = {**exps,
-                    **{key + '.' + lin_key: lin_value for lin_key, lin_value in mlflow_linearize(value).items()}}
-        else:
-            exps[key] = value
+    stack = [('', dictionary)]
+    while stack:
+        prefix, d = stack.pop()
+        for key, value in d.items():
+            lin_key = prefix + key
+            if value.__class__ is dict or isinstance(value, collections.abc.Mapping):
+                stack.append((lin_key + '.', value))
+            else:
+                exps[lin_key] = value
     return exps
 
 
@@ -153,16 +227,17 @@ def get_experiment_logger(destination_folder):
     :param destination_folder: folder where to save the log
     :return: logger
     """
-    # Instantiate the formatted and force-flush file handler
+    # Instantiate the formatted file handler, fed through a background-thread queue
     formatter = logging.Formatter('%(asctime)s %(message)s', '[%H:%M:%S]')
     file_handler = FlushFileHandler(os.path.join(destination_folder, 'log.txt'))
     file_handler.setFormatter(formatter)
+    queue_handler = BackgroundLogHandler(file_handler)
 
     # Instantiate the logger
     logger = logging.getLogger('callback')
     for handler in logger.handlers:  # Delete all the current handlers
         logger.removeHandler(handler)
-    logger.addHandler(file_handler)
+    logger.addHandler(queue_handler)
     logger.setLevel(logging.INFO)
     logger.propagate = False  # Do not write also on stdout (i.e. don't propagate to upper-level logger)
     return logger